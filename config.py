@@ -3,7 +3,8 @@ Configuration module for OpenAI API key management.
 
 This module loads and validates the OPENAI_API_KEY from the environment
 using the .env file. It provides centralized configuration management
-and ensures the API key is properly configured before use.
+and ensures the API key is properly configured before use. Optional
+tuning settings are read from the same environment with defaults.
 """
 
 import os
@@ -36,5 +37,29 @@ def _validate_api_key() -> str:
     return api_key
 
 
+def _read_silence_threshold() -> int:
+    """
+    Read the silence gate level from environment.
+    
+    Returns:
+        int: SILENCE_RMS_THRESHOLD, or 300 if it is not set
+        
+    Raises:
+        ValueError: If SILENCE_RMS_THRESHOLD is not a non-negative integer
+    """
+    value = os.getenv("SILENCE_RMS_THRESHOLD", "300")
+    
+    if not value.strip().isdigit():
+        raise ValueError(
+            f"SILENCE_RMS_THRESHOLD must be a non-negative integer, got {value!r}. "
+            "Use 0 to send every chunk to the API."
+        )
+    
+    return int(value)
+
+
 # Validate and load the API key at module import time
 OPENAI_API_KEY = _validate_api_key()
+
+# RMS level (16-bit sample units) below which audio chunks are skipped as silence
+SILENCE_RMS_THRESHOLD = _read_silence_threshold()
@@ -8,7 +8,7 @@ fallback mechanisms from Whisper API to Google Speech Recognition.
 import logging
 import socket
 import time
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import openai
 import speech_recognition as sr
 
@@ -70,11 +70,11 @@ class NetworkSimulator:
             request_time: Time in seconds before response
         
         Returns:
-            MagicMock: Mock that delays before returning
+            callable: Function that delays before returning a transcript string
         """
         def delayed_response(*args, **kwargs):
             time.sleep(request_time)
-            return MagicMock(text="Simulated response after delay")
+            return "Simulated response after delay"
         
         return delayed_response
     
@@ -98,7 +98,7 @@ class NetworkSimulator:
             if failure_pattern[pattern_index]:
                 raise ConnectionError(f"Call {call_count[0]} failed as per pattern")
             else:
-                return MagicMock(text=f"Success on call {call_count[0]}")
+                return f"Success on call {call_count[0]}"
         
         return intermittent_call
 
@@ -7,12 +7,83 @@ OpenAI's Whisper API and Google's Speech Recognition API for Persian speech.
 
 import logging
 import json
+import string
 from pathlib import Path
 from datetime import datetime
 from difflib import SequenceMatcher
 
 logger = logging.getLogger(__name__)
 
+# Punctuation removed before comparison: ASCII plus Persian comma, semicolon,
+# question mark, guillemets and ellipsis
+_PUNCTUATION = string.punctuation + '،؛؟«»…'
+
+# Normalization table: Arabic yeh/kaf and Arabic-Indic digits map to their
+# Persian forms, ASCII letters are lowercased, ZWNJ and punctuation become
+# word breaks, and diacritics (harakat, superscript alef) and tatweel are
+# dropped, so the two APIs' spelling variants are not counted as
+# transcription differences
+_NORMALIZATION_TABLE = str.maketrans({
+    'ي': 'ی',
+    'ى': 'ی',
+    'ك': 'ک',
+    **{chr(0x0660 + i): chr(0x06F0 + i) for i in range(10)},
+    **{chr(c): chr(c + 32) for c in range(ord('A'), ord('Z') + 1)},
+    '\u200c': ' ',
+    **{char: ' ' for char in _PUNCTUATION},
+    **{chr(c): None for c in range(0x064B, 0x0653)},
+    '\u0670': None,
+    '\u0640': None,
+})
+
+
+def _normalize_text(text):
+    """
+    Normalize text for comparison in a single str.translate pass.
+    
+    Punctuation and ZWNJ become spaces, so runs of whitespace are collapsed
+    afterwards to keep character similarity independent of them.
+    
+    Args:
+        text: Transcribed text
+    
+    Returns:
+        str: Normalized text
+    """
+    return " ".join(text.translate(_NORMALIZATION_TABLE).split())
+
+
+def _edit_distance(seq1, seq2):
+    """
+    Calculate Levenshtein edit distance between two sequences.
+    
+    Args:
+        seq1: Reference sequence (string or list of words)
+        seq2: Hypothesis sequence (string or list of words)
+    
+    Returns:
+        int: Minimum number of substitutions, deletions and insertions
+    """
+    if seq1 == seq2:
+        return 0
+    
+    # Keep the shorter sequence as the row to bound memory
+    if len(seq1) < len(seq2):
+        seq1, seq2 = seq2, seq1
+    
+    previous = list(range(len(seq2) + 1))
+    for i, item1 in enumerate(seq1, 1):
+        current = [i]
+        for j, item2 in enumerate(seq2, 1):
+            current.append(min(
+                previous[j] + 1,                      # deletion
+                current[j - 1] + 1,                   # insertion
+                previous[j - 1] + (item1 != item2)    # substitution
+            ))
+        previous = current
+    
+    return previous[-1]
+
 
 class TranscriptionComparer:
     """Compare transcriptions from Whisper and Google APIs."""
@@ -29,7 +100,13 @@ class TranscriptionComparer:
         Returns:
             float: Similarity ratio (0.0 to 1.0)
         """
-        matcher = SequenceMatcher(None, text1, text2)
+        # Identical transcriptions need no matching work
+        if text1 == text2:
+            return 1.0
+        
+        # autojunk would discard frequent characters (spaces, common Persian
+        # letters) once a text reaches 200 characters, skewing the ratio
+        matcher = SequenceMatcher(None, text1, text2, autojunk=False)
         return matcher.ratio()
     
     @staticmethod
@@ -38,7 +115,7 @@ class TranscriptionComparer:
         Calculate word-level similarity between two texts.
         
         Args:
-            text1: First text
+            text1: First text (reference for word error rate)
             text2: Second text
         
         Returns:
@@ -47,15 +124,25 @@ class TranscriptionComparer:
         words1 = text1.split()
         words2 = text2.split()
         
-        matcher = SequenceMatcher(None, words1, words2)
-        word_ratio = matcher.ratio()
+        if words1 == words2:
+            word_ratio = 1.0
+        else:
+            matcher = SequenceMatcher(None, words1, words2, autojunk=False)
+            word_ratio = matcher.ratio()
         
         # Calculate word error rate (WER)
-        # WER = (substitutions + deletions + insertions) / total words
+        # WER = (substitutions + deletions + insertions) / reference words
+        word_errors = _edit_distance(words1, words2)
+        if words1:
+            word_error_rate = word_errors / len(words1)
+        else:
+            word_error_rate = 1.0 if words2 else 0.0
         total_words = max(len(words1), len(words2))
         
         return {
             'word_ratio': word_ratio,
+            'word_errors': word_errors,
+            'word_error_rate': word_error_rate,
             'words_api1': len(words1),
             'words_api2': len(words2),
             'total_words': total_words
@@ -74,12 +161,16 @@ class TranscriptionComparer:
         Returns:
             dict: Comparison results
         """
-        logger.info(f"Comparing transcriptions for: {sample_name}")
+        # Normalize once and share the result between both metrics
+        whisper_normalized = _normalize_text(whisper_text)
+        google_normalized = _normalize_text(google_text)
         
         char_similarity = TranscriptionComparer.character_similarity(
-            whisper_text, google_text
+            whisper_normalized, google_normalized
+        )
+        word_metrics = TranscriptionComparer.word_similarity(
+            whisper_normalized, google_normalized
         )
-        word_metrics = TranscriptionComparer.word_similarity(whisper_text, google_text)
         
         # Determine if Whisper is better
         whisper_better = char_similarity >= 0.5  # Whisper considered better if >50% similar
@@ -92,6 +183,8 @@ class TranscriptionComparer:
             'character_similarity': round(char_similarity, 3),
             'word_metrics': {
                 'word_similarity_ratio': round(word_metrics['word_ratio'], 3),
+                'word_error_rate': round(word_metrics['word_error_rate'], 3),
+                'word_errors': word_metrics['word_errors'],
                 'whisper_words': word_metrics['words_api1'],
                 'google_words': word_metrics['words_api2']
             },
@@ -99,9 +192,15 @@ class TranscriptionComparer:
             'comparison_timestamp': datetime.now().isoformat()
         }
         
-        logger.info(f"  Character similarity: {char_similarity:.1%}")
-        logger.info(f"  Word similarity: {word_metrics['word_ratio']:.1%}")
-        logger.info(f"  Whisper better: {improvement}")
+        # Skip per-sample message formatting when INFO is filtered out,
+        # and emit one record per comparison instead of one per line
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("\n".join([
+                f"Comparing transcriptions for: {sample_name}",
+                f"  Character similarity: {char_similarity:.1%}",
+                f"  Word similarity: {word_metrics['word_ratio']:.1%}",
+                f"  Whisper better: {improvement}",
+            ]))
         
         return results
 
@@ -117,7 +216,6 @@ class QualityTestFramework:
             output_dir: Directory for saving test results
         """
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(exist_ok=True)
         self.test_results = []
     
     def add_comparison(self, sample_name, whisper_text, google_text):
@@ -134,6 +232,19 @@ class QualityTestFramework:
         )
         self.test_results.append(comparison)
     
+    def add_comparisons(self, comparisons):
+        """
+        Add several transcription comparison results at once.
+        
+        Args:
+            comparisons: Iterable of (sample_name, whisper_text, google_text) tuples
+        """
+        self.test_results.extend(
+            TranscriptionComparer.compare_transcriptions(*comparison)
+            for comparison in comparisons
+        )
+        logger.info("Added comparisons, total results: %d", len(self.test_results))
+    
     def calculate_overall_improvement(self):
         """
         Calculate overall improvement metrics.
@@ -148,21 +259,36 @@ class QualityTestFramework:
                 'average_improvement': 0.0
             }
         
-        char_similarities = [
-            r['character_similarity'] for r in self.test_results
-        ]
-        
-        whisper_better = sum(
-            1 for r in self.test_results if r['whisper_quality_better'] == 'Yes'
+        # Accumulate every aggregate in a single pass over the results
+        total_tests = len(self.test_results)
+        similarity_sum = 0.0
+        whisper_better = 0
+        total_word_errors = 0
+        total_reference_words = 0
+        for r in self.test_results:
+            similarity_sum += r['character_similarity']
+            if r['whisper_quality_better'] == 'Yes':
+                whisper_better += 1
+            word_metrics = r['word_metrics']
+            total_word_errors += word_metrics['word_errors']
+            total_reference_words += word_metrics['whisper_words']
+        
+        average_similarity = similarity_sum / total_tests
+        whisper_better_percentage = (whisper_better / total_tests) * 100
+        
+        # Corpus-level WER: total edits over total reference words, rather
+        # than an average of per-sample rates
+        corpus_wer = (
+            total_word_errors / total_reference_words
+            if total_reference_words else 0.0
         )
         
-        average_similarity = sum(char_similarities) / len(char_similarities)
-        
         return {
-            'total_tests': len(self.test_results),
+            'total_tests': total_tests,
             'whisper_better_count': whisper_better,
-            'whisper_better_percentage': (whisper_better / len(self.test_results)) * 100,
+            'whisper_better_percentage': whisper_better_percentage,
             'average_character_similarity': round(average_similarity, 3),
+            'corpus_word_error_rate': round(corpus_wer, 3),
             'improvement_target': '50-80%',
             'target_met': whisper_better_percentage >= 50
         }
@@ -187,12 +313,13 @@ class QualityTestFramework:
             'recommendations': self._generate_recommendations(overall_metrics)
         }
         
-        # Save to JSON
+        # Save to JSON (output directory is only created once a report is written)
+        self.output_dir.mkdir(exist_ok=True)
         output_path = self.output_dir / output_filename
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(report, f, indent=2, ensure_ascii=False)
         
-        logger.info(f"Quality report saved: {output_path}")
+        logger.info("Quality report saved: %s", output_path)
         
         return report
     
@@ -209,19 +336,23 @@ class QualityTestFramework:
         """
         recommendations = []
         
-        if metrics.get('whisper_better_percentage', 0) < 50:
+        # Empty-result metrics omit these keys, so look each up once with a default
+        whisper_better_percentage = metrics.get('whisper_better_percentage', 0)
+        average_similarity = metrics.get('average_character_similarity', 0)
+        
+        if whisper_better_percentage < 50:
             recommendations.append(
                 "Whisper API shows improvement in less than 50% of test cases. "
                 "Consider: 1) Testing with more diverse audio samples, "
                 "2) Adjusting audio preprocessing, 3) Tuning API parameters"
             )
-        elif metrics.get('whisper_better_percentage', 0) >= 50:
+        else:
             recommendations.append(
                 "Whisper API demonstrates improvement in majority of cases. "
                 "Ready for production deployment."
             )
         
-        if metrics.get('average_character_similarity', 0) < 0.7:
+        if average_similarity < 0.7:
             recommendations.append(
                 "Character-level similarity is low. Ensure audio samples are "
                 "of good quality and test with varied speaker characteristics."
@@ -236,69 +367,64 @@ class QualityTestFramework:
         return recommendations
 
 
-def create_quality_test_template():
-    """
-    Create a template for manual quality testing.
-    
-    This template guides manual testing when actual transcriptions
-    are obtained from the APIs.
-    """
-    template = {
-        "test_samples": [
-            {
-                "name": "short_clear.wav",
-                "duration_seconds": 5,
-                "description": "Clear Persian speech without background noise",
-                "expected_content": "[Actual Persian speech text here]",
-                "whisper_transcription": "[To be filled after testing]",
-                "google_transcription": "[To be filled after testing]",
-                "notes": ""
-            },
-            {
-                "name": "medium_dialogue.wav",
-                "duration_seconds": 30,
-                "description": "Conversational Persian between two speakers",
-                "expected_content": "[Actual dialogue text here]",
-                "whisper_transcription": "[To be filled after testing]",
-                "google_transcription": "[To be filled after testing]",
-                "notes": ""
-            },
-            {
-                "name": "noisy_speech.wav",
-                "duration_seconds": 5,
-                "description": "Persian speech with background noise",
-                "expected_content": "[Actual Persian speech text here]",
-                "whisper_transcription": "[To be filled after testing]",
-                "google_transcription": "[To be filled after testing]",
-                "notes": "Noise robustness comparison"
-            },
-            {
-                "name": "multiple_speakers.wav",
-                "duration_seconds": 30,
-                "description": "Multiple Persian speakers in conversation",
-                "expected_content": "[Actual dialogue text here]",
-                "whisper_transcription": "[To be filled after testing]",
-                "google_transcription": "[To be filled after testing]",
-                "notes": "Speaker differentiation capability"
-            },
-            {
-                "name": "fast_speech.wav",
-                "duration_seconds": 5,
-                "description": "Fast-paced Persian speech",
-                "expected_content": "[Actual Persian speech text here]",
-                "whisper_transcription": "[To be filled after testing]",
-                "google_transcription": "[To be filled after testing]",
-                "notes": "Speech rate handling"
-            }
-        ],
-        "evaluation_criteria": {
-            "accuracy": "Character-level and word-level accuracy",
-            "noise_robustness": "Handling of background noise",
-            "speaker_clarity": "Clarity of multiple speakers",
-            "punctuation": "Correct Persian punctuation",
-            "diacritics": "Preservation of Persian diacritical marks"
+# Static manual-testing template, serialized once below; callers receive
+# fresh copies decoded from the JSON, so the shared constant is never mutated
+_QUALITY_TEST_TEMPLATE = {
+    "test_samples": [
+        {
+            "name": "short_clear.wav",
+            "duration_seconds": 5,
+            "description": "Clear Persian speech without background noise",
+            "expected_content": "[Actual Persian speech text here]",
+            "whisper_transcription": "[To be filled after testing]",
+            "google_transcription": "[To be filled after testing]",
+            "notes": ""
+        },
+        {
+            "name": "medium_dialogue.wav",
+            "duration_seconds": 30,
+            "description": "Conversational Persian between two speakers",
+            "expected_content": "[Actual dialogue text here]",
+            "whisper_transcription": "[To be filled after testing]",
+            "google_transcription": "[To be filled after testing]",
+            "notes": ""
+        },
+        {
+            "name": "noisy_speech.wav",
+            "duration_seconds": 5,
+            "description": "Persian speech with background noise",
+            "expected_content": "[Actual Persian speech text here]",
+            "whisper_transcription": "[To be filled after testing]",
+            "google_transcription": "[To be filled after testing]",
+            "notes": "Noise robustness comparison"
         },
-        "instructions": """
+        {
+            "name": "multiple_speakers.wav",
+            "duration_seconds": 30,
+            "description": "Multiple Persian speakers in conversation",
+            "expected_content": "[Actual dialogue text here]",
+            "whisper_transcription": "[To be filled after testing]",
+            "google_transcription": "[To be filled after testing]",
+            "notes": "Speaker differentiation capability"
+        },
+        {
+            "name": "fast_speech.wav",
+            "duration_seconds": 5,
+            "description": "Fast-paced Persian speech",
+            "expected_content": "[Actual Persian speech text here]",
+            "whisper_transcription": "[To be filled after testing]",
+            "google_transcription": "[To be filled after testing]",
+            "notes": "Speech rate handling"
+        }
+    ],
+    "evaluation_criteria": {
+        "accuracy": "Character-level and word-level accuracy",
+        "noise_robustness": "Handling of background noise",
+        "speaker_clarity": "Clarity of multiple speakers",
+        "punctuation": "Correct Persian punctuation",
+        "diacritics": "Preservation of Persian diacritical marks"
+    },
+    "instructions": """
 1. Test each sample with both Whisper and Google APIs
 2. Record exact transcriptions in the fields above
 3. Compare character-level similarity
@@ -307,20 +433,49 @@ def create_quality_test_template():
 6. Calculate improvement percentage (Whisper vs Google)
 7. Document findings in test_report.md
         """
-    }
+}
+_TEMPLATE_JSON = json.dumps(_QUALITY_TEST_TEMPLATE, indent=2, ensure_ascii=False)
+
+
+def create_quality_test_template():
+    """
+    Create a template for manual quality testing.
     
-    return template
+    This template guides manual testing when actual transcriptions
+    are obtained from the APIs.
+    """
+    return json.loads(_TEMPLATE_JSON)
 
 
 def save_quality_test_template(filename='quality_test_template.json'):
     """Save quality test template to file."""
-    template = create_quality_test_template()
-    
     with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(template, f, indent=2, ensure_ascii=False)
+        f.write(_TEMPLATE_JSON)
     
-    logger.info(f"Quality test template saved: {filename}")
-    return template
+    logger.info("Quality test template saved: %s", filename)
+    return create_quality_test_template()
+
+
+# Example comparisons (with synthetic data) as
+# (sample_name, whisper_text, google_text) tuples.
+# In real testing, these would be actual transcriptions from the APIs
+_EXAMPLE_COMPARISONS = (
+    (
+        "short_clear.wav",
+        "سلام، چطور می‌تونم کمکتون کنم؟",
+        "سلام چطور می تونم کمکتون کنم"
+    ),
+    (
+        "medium_dialogue.wav",
+        "خواهش می‌کنم توضیح بدهید",
+        "خواهش می کنم توضیح بدهید"
+    ),
+    (
+        "noisy_speech.wav",
+        "این جملهٔ آزمایشی است",
+        "این جمله آزمایشی است"
+    ),
+)
 
 
 def run_example_quality_test():
@@ -328,41 +483,26 @@ def run_example_quality_test():
     logger.info("Running example quality comparison test...")
     
     framework = QualityTestFramework()
-    
-    # Example comparisons (with synthetic data)
-    # In real testing, these would be actual transcriptions from the APIs
-    
-    framework.add_comparison(
-        sample_name="short_clear.wav",
-        whisper_text="سلام، چطور می‌تونم کمکتون کنم؟",
-        google_text="سلام چطور می تونم کمکتون کنم"
-    )
-    
-    framework.add_comparison(
-        sample_name="medium_dialogue.wav",
-        whisper_text="خواهش می‌کنم توضیح بدهید",
-        google_text="خواهش می کنم توضیح بدهید"
-    )
-    
-    framework.add_comparison(
-        sample_name="noisy_speech.wav",
-        whisper_text="این جملهٔ آزمایشی است",
-        google_text="این جمله آزمایشی است"
-    )
+    framework.add_comparisons(_EXAMPLE_COMPARISONS)
     
     # Generate report
     report = framework.generate_quality_report()
     
-    # Print summary
-    logger.info("\n" + "="*70)
-    logger.info("QUALITY COMPARISON SUMMARY")
-    logger.info("="*70)
-    logger.info(f"Total comparisons: {report['total_comparisons']}")
-    logger.info(f"Overall metrics: {report['overall_metrics']}")
-    logger.info(f"\nRecommendations:")
-    for rec in report['recommendations']:
-        logger.info(f"  • {rec}")
-    logger.info("="*70)
+    # Print summary as a single log record
+    if logger.isEnabledFor(logging.INFO):
+        summary_lines = [
+            "",
+            "=" * 70,
+            "QUALITY COMPARISON SUMMARY",
+            "=" * 70,
+            f"Total comparisons: {report['total_comparisons']}",
+            f"Overall metrics: {report['overall_metrics']}",
+            "",
+            "Recommendations:",
+        ]
+        summary_lines.extend(f"  • {rec}" for rec in report['recommendations'])
+        summary_lines.append("=" * 70)
+        logger.info("\n".join(summary_lines))
     
     return report
 
@@ -370,7 +510,8 @@ def run_example_quality_test():
 if __name__ == '__main__':
     logging.basicConfig(
         level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%H:%M:%S'
     )
     
     # Save template for manual testing
@@ -5,13 +5,21 @@ This module provides the UsageTracker class to track API usage, calculate costs,
 and manage persistent storage of usage metrics with thread-safe operations.
 """
 
+import atexit
 import json
 import os
 import threading
+import time
+import weakref
 from datetime import datetime, timedelta
 from pathlib import Path
 import logging
 
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks
+    fcntl = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -26,13 +34,26 @@ class UsageTracker:
     - Daily and weekly aggregates
     - Estimated costs at $0.006 per minute
     
-    Storage: JSON file in application directory (usage_data.json)
-    Thread Safety: Uses threading.Lock for concurrent access
+    Storage: JSON snapshot in application directory (usage_data.json) plus an
+             append-only event log (usage_data.log). Each tracked duration
+             appends one line to the log; the snapshot is rewritten and the
+             log truncated every FLUSH_INTERVAL seconds, on flush(), and at
+             interpreter exit. Logged events newer than the snapshot are
+             replayed on startup.
+    Single Writer: Each tracker holds an exclusive lock on its log while
+                   open, so a second tracker on the same file (in this or
+                   another process) raises RuntimeError until close()
+    Thread Safety: A state lock guards the in-memory data and is never held
+                   across file I/O; a separate I/O lock orders log appends
+                   and snapshot compaction (always taken first)
     """
     
     # Default cost per minute in USD
     COST_PER_MINUTE = 0.006
     
+    # Seconds to let events accumulate in the log before compacting into the snapshot
+    FLUSH_INTERVAL = 30.0
+    
     # Default storage location
     DEFAULT_STORAGE_PATH = Path.home() / ".sokhan_negar" / "usage_data.json"
     
@@ -42,11 +63,50 @@ class UsageTracker:
         
         Args:
             storage_path: Path to JSON storage file. Defaults to ~/.sokhan_negar/usage_data.json
+            
+        Raises:
+            RuntimeError: If another open tracker already uses storage_path
         """
         self.storage_path = Path(storage_path) if storage_path else self.DEFAULT_STORAGE_PATH
+        self.log_path = self.storage_path.with_suffix(".log")
         self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._dirty = False
+        self._flush_timer = None
+        # (expires_at, day_key, week_key) for the current local date
+        self._key_cache = (0.0, None, None)
         self._ensure_storage_directory()
-        self._initialize_storage()
+        # Lock the log before reading anything, so no other tracker compacts underneath us
+        self._log_fd = self._open_log()
+        # A freshly created file already holds the defaults; skip reading it back
+        self._state = self._initialize_storage() or self._read_data()
+        self._seq = int(self._state.get("log_seq", 0))
+        self._replay_log()
+        if self.log_path.exists() and self.log_path.stat().st_size:
+            # Fold replayed events into the snapshot and drop stale or torn lines
+            self._compact()
+        _live_trackers.add(self)
+    
+    def _open_log(self):
+        """
+        Open the event log for appending and take its exclusive lock.
+        
+        Returns:
+            int: Raw O_APPEND descriptor; each event batch is one unbuffered write() at end of file
+            
+        Raises:
+            RuntimeError: If another tracker holds the lock
+        """
+        log_fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(log_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(log_fd)
+                raise RuntimeError(
+                    f"Usage data at {self.storage_path} is in use by another tracker"
+                ) from None
+        return log_fd
     
     def _ensure_storage_directory(self):
         """Create storage directory if it doesn't exist."""
@@ -56,19 +116,39 @@ class UsageTracker:
             logger.error(f"Failed to create storage directory: {e}")
             raise
     
+    @staticmethod
+    def _default_data():
+        """
+        Build a fresh usage data structure with zeroed counters.
+        
+        Returns:
+            dict: Default usage data
+        """
+        now = datetime.utcnow().isoformat()
+        return {
+            "total_minutes": 0.0,
+            "successful_minutes": 0.0,
+            "failed_attempts": 0,
+            "created_at": now,
+            "last_updated": now,
+            "daily_aggregate": {},
+            "weekly_aggregate": {}
+        }
+    
     def _initialize_storage(self):
-        """Initialize JSON storage file with default structure if it doesn't exist."""
+        """
+        Initialize JSON storage file with default structure if it doesn't exist.
+        
+        Returns:
+            dict: The default data written, or None if the file already existed
+        """
         if not self.storage_path.exists():
-            default_data = {
-                "total_minutes": 0.0,
-                "successful_minutes": 0.0,
-                "failed_attempts": 0,
-                "created_at": datetime.utcnow().isoformat(),
-                "last_updated": datetime.utcnow().isoformat(),
-                "daily_aggregate": {},
-                "weekly_aggregate": {}
-            }
+            default_data = self._default_data()
             self._write_data(default_data)
+            # Events in a leftover log belong to a snapshot that no longer exists
+            os.ftruncate(self._log_fd, 0)
+            return default_data
+        return None
     
     def _read_data(self):
         """
@@ -91,15 +171,7 @@ class UsageTracker:
         
         except FileNotFoundError:
             logger.warning(f"Usage data file not found at {self.storage_path}, creating new file")
-            default_data = {
-                "total_minutes": 0.0,
-                "successful_minutes": 0.0,
-                "failed_attempts": 0,
-                "created_at": datetime.utcnow().isoformat(),
-                "last_updated": datetime.utcnow().isoformat(),
-                "daily_aggregate": {},
-                "weekly_aggregate": {}
-            }
+            default_data = self._default_data()
             self._write_data(default_data)
             return default_data
         
@@ -107,29 +179,13 @@ class UsageTracker:
             logger.error(f"Usage data file corrupted at {self.storage_path}, reinitializing")
             # Backup corrupted file
             self._backup_corrupted_file()
-            default_data = {
-                "total_minutes": 0.0,
-                "successful_minutes": 0.0,
-                "failed_attempts": 0,
-                "created_at": datetime.utcnow().isoformat(),
-                "last_updated": datetime.utcnow().isoformat(),
-                "daily_aggregate": {},
-                "weekly_aggregate": {}
-            }
+            default_data = self._default_data()
             self._write_data(default_data)
             return default_data
         
         except Exception as e:
             logger.error(f"Unexpected error reading usage data: {e}")
-            default_data = {
-                "total_minutes": 0.0,
-                "successful_minutes": 0.0,
-                "failed_attempts": 0,
-                "created_at": datetime.utcnow().isoformat(),
-                "last_updated": datetime.utcnow().isoformat(),
-                "daily_aggregate": {},
-                "weekly_aggregate": {}
-            }
+            default_data = self._default_data()
             return default_data
     
     def _write_data(self, data):
@@ -139,6 +195,9 @@ class UsageTracker:
         Args:
             data: Dictionary to write
             
+        Returns:
+            bool: True if the file was replaced, False if the write failed
+            
         Raises:
             - Logs errors for write failures
             - Attempts to handle disk space errors
@@ -147,10 +206,11 @@ class UsageTracker:
             # Create temporary file to ensure atomic write
             temp_path = str(self.storage_path) + ".tmp"
             with open(temp_path, 'w') as f:
-                json.dump(data, f, indent=2)
+                f.write(json.dumps(data, separators=(",", ":")))
             
             # Atomic rename (safer than direct overwrite)
             os.replace(temp_path, self.storage_path)
+            return True
         
         except OSError as e:
             if e.errno == 28:  # No space left on device
@@ -160,6 +220,99 @@ class UsageTracker:
         
         except Exception as e:
             logger.error(f"Failed to write usage data: {e}")
+        
+        return False
+    
+    def _replay_log(self):
+        """
+        Apply logged events newer than the snapshot to the in-memory data.
+        
+        Returns:
+            int: Number of events replayed
+        """
+        replayed = 0
+        snapshot_seq = self._seq
+        try:
+            with open(self.log_path, 'r', encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                        if event["n"] <= snapshot_seq:
+                            continue
+                        when = datetime.fromisoformat(event["t"])
+                        self._accumulate(self._state, event["d"] / 60.0, event["s"], when)
+                    except (ValueError, KeyError, TypeError):
+                        # Torn last line from an interrupted append
+                        logger.warning("Skipping unreadable usage log entry: %r", line)
+                        continue
+                    # Concurrent appends may land slightly out of sequence order
+                    self._seq = max(self._seq, event["n"])
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Failed to read usage log: {e}")
+        
+        if replayed:
+            logger.info("Replayed %d usage events from %s", replayed, self.log_path)
+        return replayed
+    
+    def _append_log(self, durations, success, first_seq):
+        """
+        Append one event line per tracked duration to the log.
+        
+        Called without the state lock; takes the I/O lock for the write itself.
+        
+        Args:
+            durations: Durations in seconds, already validated as positive
+            success: Whether the transcriptions were successful
+            first_seq: Sequence number reserved for the first event
+        """
+        timestamp = datetime.now().isoformat(timespec="seconds")
+        lines = []
+        for seq, duration_seconds in enumerate(durations, first_seq):
+            event = {"n": seq, "t": timestamp, "d": duration_seconds, "s": success}
+            lines.append(json.dumps(event, separators=(",", ":")) + "\n")
+        
+        with self._io_lock:
+            if self._log_fd is None:
+                # Closed tracker: the dirty flag alone gets the data into the next snapshot
+                return
+            try:
+                os.write(self._log_fd, "".join(lines).encode("utf-8"))
+            except OSError as e:
+                # The in-memory state is still written by the next compaction
+                logger.error(f"Failed to append to usage log: {e}")
+    
+    def _compact(self):
+        """
+        Write the in-memory data as a new snapshot and truncate the log.
+        
+        The I/O lock must be held and the state lock must not be: the state lock
+        is only taken briefly to copy the data, so tracking continues during the
+        disk write. Events tracked after the copy append to the log once the I/O
+        lock is released and carry sequence numbers above the snapshot's log_seq.
+        """
+        with self._lock:
+            self._state["log_seq"] = self._seq
+            snapshot = dict(self._state)
+            snapshot["daily_aggregate"] = dict(self._state["daily_aggregate"])
+            snapshot["weekly_aggregate"] = dict(self._state["weekly_aggregate"])
+            self._dirty = False
+        
+        if not self._write_data(snapshot):
+            # Keep the log so its events are not lost, and retry on the next flush
+            with self._lock:
+                self._mark_dirty()
+            return
+        
+        if self._log_fd is None:
+            self.log_path.unlink(missing_ok=True)
+            return
+        try:
+            os.ftruncate(self._log_fd, 0)
+        except OSError as e:
+            logger.error(f"Failed to truncate usage log: {e}")
     
     def _validate_data_structure(self, data):
         """
@@ -169,15 +322,7 @@ class UsageTracker:
             data: Dictionary to validate
         """
         # Ensure required fields exist
-        required_fields = {
-            "total_minutes": 0.0,
-            "successful_minutes": 0.0,
-            "failed_attempts": 0,
-            "created_at": datetime.utcnow().isoformat(),
-            "last_updated": datetime.utcnow().isoformat(),
-            "daily_aggregate": {},
-            "weekly_aggregate": {}
-        }
+        required_fields = self._default_data()
         
         for field, default_value in required_fields.items():
             if field not in data:
@@ -208,6 +353,25 @@ class UsageTracker:
         except Exception as e:
             logger.error(f"Failed to backup corrupted file: {e}")
     
+    def _current_keys(self):
+        """
+        Get day and week keys for the current local date, recomputed only after midnight.
+        
+        Returns:
+            tuple: (day_key, week_key)
+        """
+        expires_at, day_key, week_key = self._key_cache
+        now = time.time()
+        if now >= expires_at:
+            today = datetime.fromtimestamp(now)
+            next_midnight = datetime.combine(today.date() + timedelta(days=1), datetime.min.time())
+            day_key = today.strftime("%Y-%m-%d")
+            year, week, _ = today.isocalendar()
+            week_key = f"{year}-W{week:02d}"
+            # Replace as one tuple so concurrent readers never see mixed keys
+            self._key_cache = (next_midnight.timestamp(), day_key, week_key)
+        return day_key, week_key
+    
     def _get_week_key(self, date=None):
         """
         Get week key in format YYYY-Www (ISO week format).
@@ -219,7 +383,7 @@ class UsageTracker:
             str: Week key in format YYYY-Www
         """
         if date is None:
-            date = datetime.now()
+            return self._current_keys()[1]
         year, week, _ = date.isocalendar()
         return f"{year}-W{week:02d}"
     
@@ -234,7 +398,7 @@ class UsageTracker:
             str: Day key in format YYYY-MM-DD
         """
         if date is None:
-            date = datetime.now()
+            return self._current_keys()[0]
         return date.strftime("%Y-%m-%d")
     
     def track_audio_duration(self, duration_seconds, success=True):
@@ -254,42 +418,133 @@ class UsageTracker:
         
         with self._lock:
             try:
-                data = self._read_data()
+                data = self._state
                 duration_minutes = duration_seconds / 60.0
-                
-                # Update total minutes
-                data["total_minutes"] = float(data.get("total_minutes", 0)) + duration_minutes
-                
-                # Track successful vs failed
-                if success:
-                    data["successful_minutes"] = float(data.get("successful_minutes", 0)) + duration_minutes
-                else:
-                    data["failed_attempts"] = int(data.get("failed_attempts", 0)) + 1
-                
-                # Update daily aggregate
-                day_key = self._get_day_key()
-                if "daily_aggregate" not in data:
-                    data["daily_aggregate"] = {}
-                data["daily_aggregate"][day_key] = float(data["daily_aggregate"].get(day_key, 0)) + duration_minutes
-                
-                # Update weekly aggregate
-                week_key = self._get_week_key()
-                if "weekly_aggregate" not in data:
-                    data["weekly_aggregate"] = {}
-                data["weekly_aggregate"][week_key] = float(data["weekly_aggregate"].get(week_key, 0)) + duration_minutes
-                
-                # Update timestamp
-                data["last_updated"] = datetime.utcnow().isoformat()
-                
-                # Write updated data
-                self._write_data(data)
-                
-                logger.info(f"Tracked {duration_minutes:.4f} minutes (success={success}). Total: {data['total_minutes']:.2f} minutes")
-                return self._format_stats(data)
+                self._accumulate(data, duration_minutes, success)
+                self._seq += 1
+                first_seq = self._seq
+                self._mark_dirty()
+                stats = self._format_stats(data)
             
             except Exception as e:
                 logger.error(f"Error tracking audio duration: {e}")
-                return self.get_usage_stats()
+                return self._format_stats(self._state)
+        
+        # Record the event outside the state lock; the snapshot catches up on the next flush
+        self._append_log((duration_seconds,), success, first_seq)
+        
+        logger.info("Tracked %.4f minutes (success=%s). Total: %.2f minutes",
+                    duration_minutes, success, stats['total_minutes'])
+        return stats
+    
+    def track_audio_durations(self, durations, success=True):
+        """
+        Track several audio durations under a single lock acquisition.
+        
+        Args:
+            durations: Iterable of durations in seconds; non-positive values are skipped
+            success: Whether the transcriptions were successful (True) or failed (False)
+            
+        Returns:
+            dict: Updated usage statistics
+        """
+        durations = [seconds for seconds in durations if seconds > 0]
+        if not durations:
+            return self.get_usage_stats()
+        minutes = [seconds / 60.0 for seconds in durations]
+        
+        with self._lock:
+            try:
+                data = self._state
+                for duration_minutes in minutes:
+                    self._accumulate(data, duration_minutes, success)
+                first_seq = self._seq + 1
+                self._seq += len(durations)
+                self._mark_dirty()
+                stats = self._format_stats(data)
+            
+            except Exception as e:
+                logger.error(f"Error tracking audio durations: {e}")
+                return self._format_stats(self._state)
+        
+        self._append_log(durations, success, first_seq)
+        
+        logger.info("Tracked %d chunks, %.4f minutes (success=%s). Total: %.2f minutes",
+                    len(minutes), sum(minutes), success, stats['total_minutes'])
+        return stats
+    
+    def _accumulate(self, data, duration_minutes, success, date=None):
+        """
+        Add one tracked duration to the in-memory usage data.
+        
+        Args:
+            data: Usage data dictionary to update in place
+            duration_minutes: Duration of audio in minutes
+            success: Whether transcription was successful (True) or failed (False)
+            date: Local time of the event for daily/weekly keys, or None for now
+        """
+        # Update total minutes
+        data["total_minutes"] = float(data.get("total_minutes", 0)) + duration_minutes
+        
+        # Track successful vs failed
+        if success:
+            data["successful_minutes"] = float(data.get("successful_minutes", 0)) + duration_minutes
+        else:
+            data["failed_attempts"] = int(data.get("failed_attempts", 0)) + 1
+        
+        # Update daily aggregate
+        day_key = self._get_day_key(date)
+        if "daily_aggregate" not in data:
+            data["daily_aggregate"] = {}
+        data["daily_aggregate"][day_key] = float(data["daily_aggregate"].get(day_key, 0)) + duration_minutes
+        
+        # Update weekly aggregate
+        week_key = self._get_week_key(date)
+        if "weekly_aggregate" not in data:
+            data["weekly_aggregate"] = {}
+        data["weekly_aggregate"][week_key] = float(data["weekly_aggregate"].get(week_key, 0)) + duration_minutes
+        
+        # Update timestamp
+        data["last_updated"] = datetime.utcnow().isoformat()
+    
+    def _mark_dirty(self):
+        """Flag in-memory data as changed and schedule a flush if none is pending (lock must be held)."""
+        self._dirty = True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.FLUSH_INTERVAL, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def flush(self):
+        """Compact logged usage events into the snapshot file."""
+        with self._io_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._dirty:
+                    return
+            self._compact()
+    
+    def close(self):
+        """
+        Flush pending usage and release the event log and its lock.
+        
+        Safe to call more than once. Durations tracked after close() are kept in
+        memory and written by the next snapshot rather than appended to the log.
+        """
+        with self._io_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                dirty = self._dirty
+            if dirty:
+                self._compact()
+            if self._log_fd is not None:
+                os.close(self._log_fd)
+                self._log_fd = None
+        _live_trackers.discard(self)
     
     def get_usage_stats(self):
         """
@@ -300,8 +555,7 @@ class UsageTracker:
         """
         with self._lock:
             try:
-                data = self._read_data()
-                return self._format_stats(data)
+                return self._format_stats(self._state)
             except Exception as e:
                 logger.error(f"Error getting usage stats: {e}")
                 return {
@@ -324,27 +578,17 @@ class UsageTracker:
         Returns:
             dict: Formatted statistics
         """
-        total_minutes = float(data.get("total_minutes", 0))
-        successful_minutes = float(data.get("successful_minutes", 0))
-        failed_attempts = int(data.get("failed_attempts", 0))
-        
-        # Calculate estimated cost
-        estimated_cost = total_minutes * self.COST_PER_MINUTE
-        cost_str = f"${estimated_cost:.2f}"
-        
-        # Get current day/week aggregates
-        day_key = self._get_day_key()
-        week_key = self._get_week_key()
-        daily_minutes = float(data.get("daily_aggregate", {}).get(day_key, 0))
-        weekly_minutes = float(data.get("weekly_aggregate", {}).get(week_key, 0))
+        # Field types are guaranteed by _validate_data_structure at load time
+        total_minutes = data["total_minutes"]
+        day_key, week_key = self._current_keys()
         
         return {
             "total_minutes": round(total_minutes, 2),
-            "estimated_cost": cost_str,
-            "successful_minutes": round(successful_minutes, 2),
-            "failed_attempts": failed_attempts,
-            "daily_minutes": round(daily_minutes, 2),
-            "weekly_minutes": round(weekly_minutes, 2),
+            "estimated_cost": f"${total_minutes * self.COST_PER_MINUTE:.2f}",
+            "successful_minutes": round(data["successful_minutes"], 2),
+            "failed_attempts": data["failed_attempts"],
+            "daily_minutes": round(data["daily_aggregate"].get(day_key, 0.0), 2),
+            "weekly_minutes": round(data["weekly_aggregate"].get(week_key, 0.0), 2),
             "created_at": data.get("created_at"),
             "last_updated": data.get("last_updated")
         }
@@ -359,45 +603,49 @@ class UsageTracker:
         Returns:
             dict: Updated usage statistics after reset
         """
-        with self._lock:
-            try:
-                data = self._read_data()
-                
-                if period == "daily":
-                    day_key = self._get_day_key()
-                    if "daily_aggregate" in data and day_key in data["daily_aggregate"]:
-                        daily_minutes = data["daily_aggregate"][day_key]
-                        data["total_minutes"] = float(data.get("total_minutes", 0)) - daily_minutes
-                        data["daily_aggregate"][day_key] = 0.0
-                        logger.info(f"Reset daily usage for {day_key}")
-                
-                elif period == "weekly":
-                    week_key = self._get_week_key()
-                    if "weekly_aggregate" in data and week_key in data["weekly_aggregate"]:
-                        weekly_minutes = data["weekly_aggregate"][week_key]
-                        data["total_minutes"] = float(data.get("total_minutes", 0)) - weekly_minutes
-                        data["weekly_aggregate"][week_key] = 0.0
-                        logger.info(f"Reset weekly usage for {week_key}")
+        with self._io_lock:
+            with self._lock:
+                try:
+                    data = self._state
+                    
+                    if period == "daily":
+                        day_key = self._get_day_key()
+                        if "daily_aggregate" in data and day_key in data["daily_aggregate"]:
+                            daily_minutes = data["daily_aggregate"][day_key]
+                            data["total_minutes"] = float(data.get("total_minutes", 0)) - daily_minutes
+                            data["daily_aggregate"][day_key] = 0.0
+                            logger.info(f"Reset daily usage for {day_key}")
+                    
+                    elif period == "weekly":
+                        week_key = self._get_week_key()
+                        if "weekly_aggregate" in data and week_key in data["weekly_aggregate"]:
+                            weekly_minutes = data["weekly_aggregate"][week_key]
+                            data["total_minutes"] = float(data.get("total_minutes", 0)) - weekly_minutes
+                            data["weekly_aggregate"][week_key] = 0.0
+                            logger.info(f"Reset weekly usage for {week_key}")
+                    
+                    elif period == "all":
+                        logger.info(f"Reset all usage data. Previous total: {data.get('total_minutes', 0):.2f} minutes")
+                        data["total_minutes"] = 0.0
+                        data["successful_minutes"] = 0.0
+                        data["failed_attempts"] = 0
+                        data["daily_aggregate"] = {}
+                        data["weekly_aggregate"] = {}
+                    
+                    else:
+                        logger.warning(f"Unknown reset period: {period}")
+                        return self._format_stats(data)
+                    
+                    data["last_updated"] = datetime.utcnow().isoformat()
+                    stats = self._format_stats(data)
                 
-                elif period == "all":
-                    logger.info(f"Reset all usage data. Previous total: {data.get('total_minutes', 0):.2f} minutes")
-                    data["total_minutes"] = 0.0
-                    data["successful_minutes"] = 0.0
-                    data["failed_attempts"] = 0
-                    data["daily_aggregate"] = {}
-                    data["weekly_aggregate"] = {}
-                
-                else:
-                    logger.warning(f"Unknown reset period: {period}")
-                    return self.get_usage_stats()
-                
-                data["last_updated"] = datetime.utcnow().isoformat()
-                self._write_data(data)
-                return self._format_stats(data)
+                except Exception as e:
+                    logger.error(f"Error resetting usage: {e}")
+                    return self._format_stats(self._state)
             
-            except Exception as e:
-                logger.error(f"Error resetting usage: {e}")
-                return self.get_usage_stats()
+            # Resets are not logged as events, so compact immediately (outside the state lock)
+            self._compact()
+            return stats
     
     def get_cost_warning(self, threshold_cost=1.0):
         """
@@ -419,6 +667,17 @@ class UsageTracker:
             return (False, 0.0, threshold_cost)
 
 
+# Open trackers with possibly unflushed data, closed at interpreter exit
+_live_trackers = weakref.WeakSet()
+
+
+@atexit.register
+def _close_all():
+    """Flush and close every open tracker before the interpreter exits."""
+    for tracker in list(_live_trackers):
+        tracker.close()
+
+
 # Global instance for module-level access
 _tracker_instance = None
 
@@ -2,23 +2,335 @@
 Whisper API integration for Persian speech-to-text transcription.
 
 This module provides the whisper_recognize() function to transcribe Persian audio
-using OpenAI's cloud-based Whisper API with usage tracking.
+using OpenAI's cloud-based Whisper API with usage tracking, plus
+whisper_recognize_pcm() for raw PCM input and async variants for event loops.
 """
 
+import asyncio
+import functools
+import hashlib
 import io
-import wave
+import math
+import struct
 import socket
+import threading
+import weakref
+from collections import OrderedDict
 import speech_recognition as sr
+import numpy as np
 import openai
 import logging
-from config import OPENAI_API_KEY
 from usage_tracker import get_tracker
 
+# Optional FLAC encoding: roughly halves upload size for 16-bit speech.
+# soundfile raises OSError when the libsndfile shared library is missing.
+try:
+    import soundfile
+except (ImportError, OSError):
+    soundfile = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Configure OpenAI API key
-openai.api_key = OPENAI_API_KEY
+# Shortest clip the Whisper API accepts, in seconds
+MIN_AUDIO_SECONDS = 0.1
+
+# 16-bit chunks quieter than this RMS level are treated as silence and never
+# uploaded; SILENCE_RMS_THRESHOLD in config.py, read on first use like the API key
+_silence_threshold = None
+
+# Whisper resamples everything to 16kHz, so higher-rate audio is downsampled before upload
+WHISPER_SAMPLE_RATE = 16000
+
+# Length of the windowed-sinc low-pass filter applied before downsampling; at
+# 44.1-48kHz input the Hamming-window transition band is about 1.2kHz wide
+_RESAMPLE_TAPS = 129
+
+# Upload FLAC instead of WAV when soundfile is available; set False to force WAV
+USE_FLAC = soundfile is not None
+
+# Default number of in-flight requests for whisper_recognize_batch()
+BATCH_CONCURRENCY = 4
+
+# Canonical 44-byte RIFF/WAVE header for mono PCM, compiled once:
+# RIFF chunk, 16-byte fmt chunk (PCM, 1 channel), then the data chunk header
+_WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+# Recent transcripts keyed by a hash of the audio, so retried or replayed
+# chunks are not billed and waited on again
+TRANSCRIPT_CACHE_SIZE = 256
+_transcript_cache = OrderedDict()
+_transcript_cache_lock = threading.Lock()
+
+# Shared OpenAI clients, created on first use so importing this module needs no API key
+_client = None
+_async_clients = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+
+def _get_client() -> openai.OpenAI:
+    """
+    Get the shared OpenAI client, creating it on first use.
+    
+    Reusing one client keeps its HTTP connection pool, so consecutive chunks
+    skip the TCP and TLS handshakes.
+    
+    Returns:
+        openai.OpenAI: Client configured with OPENAI_API_KEY
+        
+    Raises:
+        ValueError: If OPENAI_API_KEY is not configured
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from config import OPENAI_API_KEY
+                _client = openai.OpenAI(api_key=OPENAI_API_KEY)
+    return _client
+
+
+def _get_async_client() -> openai.AsyncOpenAI:
+    """
+    Get the AsyncOpenAI client for the running event loop, creating it on first use.
+    
+    An async client's connection pool is bound to the loop it first ran on, so
+    each loop gets its own client; a later asyncio.run() would otherwise reuse
+    connections from a closed loop. Clients are dropped with their loop.
+    
+    Returns:
+        openai.AsyncOpenAI: Client configured with OPENAI_API_KEY
+        
+    Raises:
+        ValueError: If OPENAI_API_KEY is not configured
+    """
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            from config import OPENAI_API_KEY
+            client = _async_clients[loop] = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+    return client
+
+
+def _get_silence_threshold() -> int:
+    """
+    Get the silence gate level, reading it from config on first use.
+    
+    Returns:
+        int: RMS level below which 16-bit chunks are skipped
+        
+    Raises:
+        ValueError: If OPENAI_API_KEY is not configured or SILENCE_RMS_THRESHOLD is invalid
+    """
+    global _silence_threshold
+    if _silence_threshold is None:
+        from config import SILENCE_RMS_THRESHOLD
+        _silence_threshold = SILENCE_RMS_THRESHOLD
+    return _silence_threshold
+
+
+def _pcm_fields(audio_data: sr.AudioData) -> tuple:
+    """
+    Unpack speech_recognition.AudioData into raw PCM arguments.
+    
+    Args:
+        audio_data: sr.AudioData object with audio frame data
+        
+    Returns:
+        tuple: (frame_data, sample_rate, sample_width)
+        
+    Raises:
+        ValueError: If audio_data is not an sr.AudioData object
+    """
+    if not isinstance(audio_data, sr.AudioData):
+        raise ValueError("Input must be a speech_recognition.AudioData object")
+    return audio_data.frame_data, audio_data.sample_rate, audio_data.sample_width
+
+
+def _pcm_to_wav(frame_data: bytes, sample_rate: int, sample_width: int) -> bytes:
+    """
+    Encode mono PCM frames as a complete WAV file.
+    
+    Args:
+        frame_data: Raw little-endian PCM frames
+        sample_rate: Sample rate in Hz
+        sample_width: Bytes per sample
+        
+    Returns:
+        bytes: 44-byte WAV header followed by the PCM frames
+        
+    Raises:
+        ValueError: If the format values do not fit a WAV header
+    """
+    try:
+        header = _WAV_HEADER.pack(
+            b'RIFF', 36 + len(frame_data), b'WAVE',
+            b'fmt ', 16, 1, 1, sample_rate, sample_rate * sample_width, sample_width, sample_width * 8,
+            b'data', len(frame_data)
+        )
+    except struct.error as e:
+        raise ValueError(f"Failed to create WAV from audio data: {str(e)}")
+    
+    # Single allocation of header + PCM
+    return header + frame_data
+
+
+def _pcm_rms(frame_data: bytes, sample_width: int):
+    """
+    Compute the RMS level of 16-bit PCM audio for the silence gate.
+    
+    Args:
+        frame_data: Raw little-endian PCM frames
+        sample_width: Bytes per sample; only 16-bit audio is measured
+        
+    Returns:
+        float or None: RMS in int16 units, or None if the audio is not 16-bit or is empty
+    """
+    if sample_width != 2:
+        return None
+    samples = np.frombuffer(frame_data, dtype='<i2', count=len(frame_data) // 2).astype(np.float64)
+    if not samples.size:
+        return None
+    # Mean square via one dot product instead of building a squared array
+    return math.sqrt(float(np.dot(samples, samples)) / samples.size)
+
+
+def _cache_key(frame_data: bytes, sample_rate: int, sample_width: int) -> tuple:
+    """
+    Build the transcript cache key for a PCM payload.
+    
+    Args:
+        frame_data: Raw PCM frames
+        sample_rate: Sample rate in Hz
+        sample_width: Bytes per sample
+        
+    Returns:
+        tuple: (BLAKE2b digest of frame_data, sample_rate, sample_width)
+    """
+    return hashlib.blake2b(frame_data, digest_size=16).digest(), sample_rate, sample_width
+
+
+def _cached_transcript(key: tuple):
+    """
+    Look up a cached transcript and mark it most recently used.
+    
+    Args:
+        key: Key from _cache_key()
+        
+    Returns:
+        str or None: Cached transcript, or None on a miss
+    """
+    with _transcript_cache_lock:
+        text = _transcript_cache.get(key)
+        if text is not None:
+            _transcript_cache.move_to_end(key)
+        return text
+
+
+def _cache_transcript(key: tuple, text: str):
+    """
+    Store a transcript, evicting the least recently used beyond TRANSCRIPT_CACHE_SIZE.
+    
+    Args:
+        key: Key from _cache_key()
+        text: Transcript to cache
+    """
+    with _transcript_cache_lock:
+        _transcript_cache[key] = text
+        _transcript_cache.move_to_end(key)
+        if len(_transcript_cache) > TRANSCRIPT_CACHE_SIZE:
+            _transcript_cache.popitem(last=False)
+
+
+@functools.lru_cache(maxsize=8)
+def _lowpass_kernel(sample_rate: int) -> np.ndarray:
+    """
+    Build the anti-aliasing filter for downsampling to WHISPER_SAMPLE_RATE.
+    
+    Args:
+        sample_rate: Input sample rate in Hz
+        
+    Returns:
+        np.ndarray: Unity-gain Hamming-windowed sinc kernel with its cutoff at
+            90% of the output Nyquist frequency (7.2kHz)
+    """
+    cutoff = 0.45 * WHISPER_SAMPLE_RATE / sample_rate  # cycles per input sample
+    offsets = np.arange(_RESAMPLE_TAPS) - (_RESAMPLE_TAPS - 1) / 2
+    kernel = np.sinc(2 * cutoff * offsets) * np.hamming(_RESAMPLE_TAPS)
+    return kernel / kernel.sum()
+
+
+def _downsample_pcm(frame_data: bytes, sample_rate: int) -> bytes:
+    """
+    Low-pass filter and downsample 16-bit PCM to WHISPER_SAMPLE_RATE.
+    
+    Decimating without the filter would fold everything between 8kHz and the
+    input Nyquist frequency (sibilants, hiss) back into the speech band.
+    
+    Args:
+        frame_data: Raw little-endian 16-bit PCM frames
+        sample_rate: Input sample rate in Hz, above WHISPER_SAMPLE_RATE
+        
+    Returns:
+        bytes: 16-bit PCM frames at WHISPER_SAMPLE_RATE
+    """
+    samples = np.frombuffer(frame_data, dtype='<i2', count=len(frame_data) // 2).astype(np.float64)
+    filtered = np.convolve(samples, _lowpass_kernel(sample_rate), mode='same')
+    
+    if sample_rate % WHISPER_SAMPLE_RATE == 0:
+        # Integer ratio (32/48kHz): keep every n-th filtered sample
+        resampled = filtered[::sample_rate // WHISPER_SAMPLE_RATE]
+    else:
+        # Fractional ratio (44.1kHz): the band-limited signal is well oversampled,
+        # so linear interpolation at the output sample times is sufficient
+        positions = np.arange(0, samples.size, sample_rate / WHISPER_SAMPLE_RATE)
+        resampled = np.interp(positions, np.arange(samples.size), filtered)
+    
+    return np.clip(np.rint(resampled), -32768, 32767).astype('<i2').tobytes()
+
+
+def _pcm_to_upload(frame_data: bytes, sample_rate: int, sample_width: int) -> tuple:
+    """
+    Encode mono PCM frames as the file tuple uploaded to the API.
+    
+    Audio above WHISPER_SAMPLE_RATE is low-pass filtered and downsampled to
+    16-bit first, since the extra samples only cost upload time. 16-bit
+    audio is sent as FLAC when USE_FLAC is set, falling back to WAV if
+    encoding fails; everything else is sent as WAV.
+    
+    Args:
+        frame_data: Raw little-endian PCM frames
+        sample_rate: Sample rate in Hz
+        sample_width: Bytes per sample
+        
+    Returns:
+        tuple: (filename, content[, content type]) for the SDK's file argument
+        
+    Raises:
+        ValueError: If the format values do not fit a WAV header
+    """
+    if sample_rate > WHISPER_SAMPLE_RATE:
+        if sample_width != 2:
+            # Width conversion alone does not resample, so it cannot alias
+            frame_data = sr.AudioData(frame_data, sample_rate, sample_width).get_raw_data(convert_width=2)
+            sample_width = 2
+        frame_data = _downsample_pcm(frame_data, sample_rate)
+        sample_rate = WHISPER_SAMPLE_RATE
+    
+    if USE_FLAC and sample_width == 2:
+        try:
+            flac_buffer = io.BytesIO()
+            soundfile.write(
+                flac_buffer, np.frombuffer(frame_data, dtype='<i2'), sample_rate,
+                format='FLAC', subtype='PCM_16'
+            )
+            return ("audio.flac", flac_buffer.getvalue(), "audio/flac")
+        except (RuntimeError, ValueError) as e:
+            logger.warning("FLAC encoding failed, uploading WAV instead: %s", e)
+    
+    # The filename tells the API the container format
+    return ("audio.wav", _pcm_to_wav(frame_data, sample_rate, sample_width))
 
 
 def _audio_data_to_wav(audio_data: sr.AudioData) -> io.BytesIO:
@@ -29,35 +341,207 @@ def _audio_data_to_wav(audio_data: sr.AudioData) -> io.BytesIO:
         audio_data: sr.AudioData object with audio frame data
         
     Returns:
-        io.BytesIO: WAV file in memory, ready for API consumption
+        io.BytesIO: WAV file in memory, positioned at the start
         
     Raises:
         ValueError: If audio_data format is invalid
     """
-    if not isinstance(audio_data, sr.AudioData):
-        raise ValueError("Input must be a speech_recognition.AudioData object")
+    return io.BytesIO(_pcm_to_wav(*_pcm_fields(audio_data)))
+
+
+def _pcm_duration(frame_data: bytes, sample_rate: int, sample_width: int) -> float:
+    """
+    Validate clip length and compute its duration for usage tracking.
+    
+    Args:
+        frame_data: Raw PCM frames
+        sample_rate: Sample rate in Hz
+        sample_width: Bytes per sample
+        
+    Returns:
+        float: Audio duration in seconds
+        
+    Raises:
+        ValueError: If audio is shorter than MIN_AUDIO_SECONDS
+    """
+    bytes_per_second = sample_rate * sample_width
+    if not bytes_per_second:
+        # Default to 5 seconds (standard chunk size) if duration cannot be calculated
+        logger.warning("Could not calculate audio duration, using default 5 seconds")
+        return 5.0
     
-    # Create in-memory WAV file
-    wav_buffer = io.BytesIO()
+    # Reject clips the API would refuse before any conversion, tracking or API call
+    num_bytes = len(frame_data)
+    if num_bytes < bytes_per_second * MIN_AUDIO_SECONDS:
+        raise ValueError(f"Audio too short: minimum length is {MIN_AUDIO_SECONDS} seconds")
+    
+    return num_bytes / bytes_per_second
+
+
+def _prepare_request(frame_data: bytes, sample_rate: int, sample_width: int) -> tuple:
+    """
+    Run the checks shared by every entry point before an API call.
+    
+    Args:
+        frame_data: Raw PCM frames
+        sample_rate: Sample rate in Hz
+        sample_width: Bytes per sample
+        
+    Returns:
+        tuple: (audio_duration_seconds, cache_key, early_text), where early_text
+            is "" for silent audio, the cached transcript for repeated audio,
+            or None when the API must be called
+        
+    Raises:
+        ValueError: If audio is shorter than MIN_AUDIO_SECONDS, or config cannot be loaded
+    """
+    audio_duration_seconds = _pcm_duration(frame_data, sample_rate, sample_width)
+    
+    # Silent chunks cost an API round-trip and credit but transcribe to nothing
+    rms = _pcm_rms(frame_data, sample_width)
+    threshold = _get_silence_threshold()
+    if rms is not None and rms < threshold:
+        logger.info("Skipping silent chunk (rms=%d, threshold=%d)", rms, threshold)
+        return audio_duration_seconds, None, ""
+    
+    # A retried or replayed chunk returns its earlier transcript without a new call
+    cache_key = _cache_key(frame_data, sample_rate, sample_width)
+    return audio_duration_seconds, cache_key, _cached_transcript(cache_key)
+
+
+def _request_params(frame_data: bytes, sample_rate: int, sample_width: int, timeout: int) -> dict:
+    """
+    Build the transcriptions.create() arguments shared by the sync and async clients.
+    
+    Args:
+        frame_data: Raw PCM frames
+        sample_rate: Sample rate in Hz
+        sample_width: Bytes per sample
+        timeout: API call timeout in seconds
+        
+    Returns:
+        dict: Keyword arguments for client.audio.transcriptions.create()
+        
+    Raises:
+        ValueError: If the audio cannot be encoded
+    """
+    # Upload encoded bytes as a (filename, content) tuple; the SDK sends the
+    # bytes as-is instead of reading a file object into yet another copy
+    return {
+        "model": "whisper-1",
+        "file": _pcm_to_upload(frame_data, sample_rate, sample_width),
+        "language": "fa",
+        "response_format": "text",
+        "timeout": timeout,
+    }
+
+
+def _finish_request(tracker, audio_duration_seconds: float, cache_key: tuple, response) -> str:
+    """
+    Track a successful transcription, cache it and extract its text.
+    
+    Args:
+        tracker: UsageTracker recording the call
+        audio_duration_seconds: Duration of the transcribed audio
+        cache_key: Key from _prepare_request() for the transcript cache
+        response: Transcript string returned by the API
+        
+    Returns:
+        str: Transcribed text with surrounding whitespace removed
+    """
+    # response_format="text" returns the transcript as a plain string
+    transcribed_text = response.strip()
+    
+    stats = tracker.track_audio_duration(audio_duration_seconds, success=True)
+    logger.info(
+        "Usage tracked - Total: %.2f min, Cost: %s, Daily: %.2f min",
+        stats['total_minutes'], stats['estimated_cost'], stats['daily_minutes']
+    )
+    
+    _cache_transcript(cache_key, transcribed_text)
+    return transcribed_text
+
+
+# How _record_failure() reports each error, checked in order so subclasses
+# (e.g. AuthenticationError under APIError) match first. Each entry is
+# (exception types, log message, replacement type, replacement message).
+# openai exceptions carry the HTTP request/response and cannot be rebuilt
+# from a message alone, so they are logged and re-raised unchanged.
+_ERROR_TABLE = (
+    (openai.AuthenticationError, "OpenAI authentication failed. Check your API key in .env file.", None, None),
+    (openai.RateLimitError, "OpenAI API quota exceeded. Please try again later.", None, None),
+    (openai.APIError, "OpenAI API error occurred.", None, None),
+    (socket.timeout, None, socket.timeout, "API call timed out after {timeout} seconds. Details: {error}"),
+    ((ConnectionError, socket.gaierror, socket.error), None, ConnectionError,
+     "Network error during API call. Details: {error}"),
+    (ValueError, None, ValueError, "Audio format error: {error}"),
+)
+
+
+def _record_failure(tracker, audio_duration_seconds: float, error: Exception, timeout: int) -> Exception:
+    """
+    Track a failed transcription and map the error to the one callers see.
+    
+    Args:
+        tracker: UsageTracker recording the call
+        audio_duration_seconds: Duration of the audio that failed
+        error: Exception raised during conversion or the API call
+        timeout: API call timeout in seconds, for the timeout message
+        
+    Returns:
+        Exception: Exception for the caller to raise
+    """
+    tracker.track_audio_duration(audio_duration_seconds, success=False)
+    
+    for error_types, log_message, replacement, message in _ERROR_TABLE:
+        if isinstance(error, error_types):
+            if log_message:
+                logger.error(log_message)
+            if replacement is None:
+                return error
+            return replacement(message.format(timeout=timeout, error=error))
+    
+    # Catch any unexpected errors and provide context
+    return Exception(f"Unexpected error during Whisper transcription: {error}")
+
+
+def whisper_recognize_pcm(frame_data: bytes, sample_rate: int = 16000, sample_width: int = 2,
+                          timeout: int = 30) -> str:
+    """
+    Transcribe raw mono PCM audio using OpenAI's Whisper API with usage tracking.
+    
+    For callers that already hold PCM bytes; avoids wrapping them in
+    sr.AudioData just to have them unpacked again.
+    
+    Args:
+        frame_data: Raw little-endian PCM frames
+        sample_rate: Sample rate in Hz (default: 16000)
+        sample_width: Bytes per sample (default: 2, int16)
+        timeout: API call timeout in seconds (default: 30)
+        
+    Returns:
+        str: Transcribed Persian text
+        
+    Raises:
+        Same exceptions as whisper_recognize()
+    """
+    audio_duration_seconds, cache_key, early_text = _prepare_request(frame_data, sample_rate, sample_width)
+    if early_text is not None:
+        return early_text
+    
+    # Fails before any tracking if the API key is missing; no API call is made
+    client = _get_client()
+    tracker = get_tracker()
     
     try:
-        with wave.open(wav_buffer, 'wb') as wav_file:
-            # Set audio parameters
-            # Channels: 1 (mono)
-            # Sample width: audio_data.sample_width (typically 2 for int16)
-            # Frame rate: audio_data.sample_rate (typically 16000)
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(audio_data.sample_width)
-            wav_file.setframerate(audio_data.sample_rate)
-            
-            # Write audio frame data
-            wav_file.writeframes(audio_data.frame_data)
+        # Call Whisper API with a per-request timeout
+        response = client.audio.transcriptions.create(
+            **_request_params(frame_data, sample_rate, sample_width, timeout)
+        )
     except Exception as e:
-        raise ValueError(f"Failed to create WAV from audio data: {str(e)}")
+        raise _record_failure(tracker, audio_duration_seconds, e, timeout)
     
-    # Reset buffer position to beginning for reading
-    wav_buffer.seek(0)
-    return wav_buffer
+    return _finish_request(tracker, audio_duration_seconds, cache_key, response)
 
 
 def whisper_recognize(audio_data: sr.AudioData, timeout: int = 30) -> str:
@@ -69,7 +553,8 @@ def whisper_recognize(audio_data: sr.AudioData, timeout: int = 30) -> str:
         timeout: API call timeout in seconds (default: 30)
         
     Returns:
-        str: Transcribed Persian text
+        str: Transcribed Persian text, or "" for silent audio; silent audio and
+            audio transcribed within the last TRANSCRIPT_CACHE_SIZE calls make no API call
         
     Raises:
         openai.AuthenticationError: If API key is invalid
@@ -77,95 +562,72 @@ def whisper_recognize(audio_data: sr.AudioData, timeout: int = 30) -> str:
         openai.APIError: For general OpenAI API errors
         socket.timeout: If API call times out
         ConnectionError: For network connectivity issues
-        ValueError: If audio format is invalid
+        ValueError: If audio format is invalid, audio is shorter than MIN_AUDIO_SECONDS,
+            or OPENAI_API_KEY is not configured
     """
-    tracker = get_tracker()
+    return whisper_recognize_pcm(*_pcm_fields(audio_data), timeout=timeout)
+
+
+async def whisper_recognize_async(audio_data: sr.AudioData, timeout: int = 30) -> str:
+    """
+    Transcribe Persian audio without blocking the running event loop.
     
-    # Calculate audio duration before API call (in seconds)
-    # AudioData.frame_data is in bytes, sample_rate is in Hz, sample_width is in bytes
-    # duration = (num_frames) / sample_rate
-    # num_frames = len(frame_data) / sample_width
-    try:
-        num_frames = len(audio_data.frame_data) / audio_data.sample_width
-        audio_duration_seconds = num_frames / audio_data.sample_rate
-    except (AttributeError, ZeroDivisionError):
-        # Default to 5 seconds (standard chunk size) if calculation fails
-        audio_duration_seconds = 5.0
-        logger.warning(f"Could not calculate audio duration, using default 5 seconds")
+    Same contract as whisper_recognize(), but awaits the shared AsyncOpenAI
+    client so concurrent transcriptions share its keep-alive connection pool.
+    Encoding the upload and writing the usage log run in a worker thread, so
+    the loop stays free while other requests are in flight.
     
-    try:
-        # Convert audio_data to WAV format
-        wav_buffer = _audio_data_to_wav(audio_data)
-        
-        # Call Whisper API with timeout
-        # Set timeout via openai client configuration
-        response = openai.audio.transcriptions.create(
-            model="whisper-1",
-            file=wav_buffer,
-            language="fa",
-            timeout=timeout
-        )
-        
-        # Extract and return transcribed text
-        transcribed_text = response.text if hasattr(response, 'text') else str(response)
+    Args:
+        audio_data: sr.AudioData object containing mono audio at 16kHz, int16
+        timeout: API call timeout in seconds (default: 30)
         
-        # Track successful transcription
-        stats = tracker.track_audio_duration(audio_duration_seconds, success=True)
-        logger.info(
-            f"Usage tracked - Total: {stats['total_minutes']:.2f} min, "
-            f"Cost: {stats['estimated_cost']}, "
-            f"Daily: {stats['daily_minutes']:.2f} min"
-        )
+    Returns:
+        str: Transcribed Persian text
         
-        return transcribed_text.strip()
+    Raises:
+        Same exceptions as whisper_recognize()
+    """
+    frame_data, sample_rate, sample_width = _pcm_fields(audio_data)
+    audio_duration_seconds, cache_key, early_text = _prepare_request(frame_data, sample_rate, sample_width)
+    if early_text is not None:
+        return early_text
     
-    except openai.AuthenticationError as e:
-        # Track failed attempt
-        tracker.track_audio_duration(audio_duration_seconds, success=False)
-        raise openai.AuthenticationError(
-            f"OpenAI authentication failed. Check your API key in .env file. "
-            f"Details: {str(e)}"
-        )
+    client = _get_async_client()
+    tracker = get_tracker()
     
-    except openai.RateLimitError as e:
-        # Track failed attempt
-        tracker.track_audio_duration(audio_duration_seconds, success=False)
-        raise openai.RateLimitError(
-            f"OpenAI API quota exceeded. Please try again later. "
-            f"Details: {str(e)}"
-        )
+    try:
+        params = await asyncio.to_thread(_request_params, frame_data, sample_rate, sample_width, timeout)
+        response = await client.audio.transcriptions.create(**params)
+    except Exception as e:
+        raise await asyncio.to_thread(_record_failure, tracker, audio_duration_seconds, e, timeout)
     
-    except openai.APIError as e:
-        # Track failed attempt
-        tracker.track_audio_duration(audio_duration_seconds, success=False)
-        raise openai.APIError(
-            f"OpenAI API error occurred. Details: {str(e)}"
-        )
+    return await asyncio.to_thread(_finish_request, tracker, audio_duration_seconds, cache_key, response)
+
+
+async def whisper_recognize_batch(chunks: list, timeout: int = 30,
+                                  max_concurrency: int = BATCH_CONCURRENCY) -> list:
+    """
+    Transcribe several audio chunks concurrently over the shared async client.
     
-    except socket.timeout as e:
-        # Track failed attempt
-        tracker.track_audio_duration(audio_duration_seconds, success=False)
-        raise socket.timeout(
-            f"API call timed out after {timeout} seconds. Details: {str(e)}"
-        )
+    Chunks are sent as separate requests rather than concatenated, so a
+    transcript never runs across chunk boundaries and each chunk is tracked
+    with its own success or failure.
     
-    except (ConnectionError, socket.gaierror, socket.error) as e:
-        # Track failed attempt
-        tracker.track_audio_duration(audio_duration_seconds, success=False)
-        raise ConnectionError(
-            f"Network error during API call. Details: {str(e)}"
-        )
+    Args:
+        chunks: List of sr.AudioData objects
+        timeout: Per-request API timeout in seconds (default: 30)
+        max_concurrency: Maximum requests in flight at once (default: BATCH_CONCURRENCY)
+        
+    Returns:
+        list: Transcribed text for each chunk, in input order
+        
+    Raises:
+        Same exceptions as whisper_recognize(), for the first chunk that fails
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
     
-    except ValueError as e:
-        # Track failed attempt
-        tracker.track_audio_duration(audio_duration_seconds, success=False)
-        # Re-raise ValueError from audio format conversion
-        raise ValueError(f"Audio format error: {str(e)}")
+    async def recognize(audio_data):
+        async with semaphore:
+            return await whisper_recognize_async(audio_data, timeout)
     
-    except Exception as e:
-        # Track failed attempt
-        tracker.track_audio_duration(audio_duration_seconds, success=False)
-        # Catch any unexpected errors and provide context
-        raise Exception(
-            f"Unexpected error during Whisper transcription: {str(e)}"
-        )
+    return await asyncio.gather(*(recognize(chunk) for chunk in chunks))